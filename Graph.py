@@ -1,3 +1,5 @@
+import hashlib
+
 ## this time around our Nodes will contain strings.
 
 class Node :
@@ -24,12 +26,28 @@ class Graph :
     def __init__(self,n_vertices=5):
         ## our adjacency list
         self.g = {}
+        ## bumped on every change, so cached results for an old map can be detected
+        self.version = 0
+        self._hash = None
+        self._hash_version = -1
 
     def add_node(self, index):
             self.g[index] = []
+            self.version += 1
 
     def add_edge(self, e):
         self.g[e.src].append(e)
+        self.version += 1
+
+    ## a hash of the nodes and edges. Two graphs with the same content get the same hash.
+    ## it's only recomputed after the graph has changed.
+    def content_hash(self):
+        if self._hash_version != self.version :
+            lines = sorted("%s %s %s" % (e.src, e.dest, e.val) for edges in self.g.values() for e in edges)
+            lines += sorted("node %s" % n for n in self.g)
+            self._hash = hashlib.sha1("\n".join(lines).encode()).hexdigest()
+            self._hash_version = self.version
+        return self._hash
 
     def get_edge(self, src, dest):
         if src in self.g :
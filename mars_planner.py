@@ -6,6 +6,10 @@ from search_algorithms import (
 )
 
 class RoverState:
+    # Packed state indices for set_based_search: the location, then one bit per flag
+    LOCATIONS = ("station", "sample", "battery")
+    N_STATES = len(LOCATIONS) * 2 ** 4
+
     def __init__(self, loc="station", sample_extracted=False, holding_sample=False, charged=False, holding_tool=False):
         # Initialize the rover's state with default values
         self.loc = loc  # Current location of the rover
@@ -45,6 +49,30 @@ class RoverState:
             f"Charged? {self.charged}"
         )
 
+    def encode(self):
+        # Compact, picklable encoding of the state (without the prev chain)
+        return (self.loc, self.sample_extracted, self.holding_sample, self.charged, self.holding_tool)
+
+    @staticmethod
+    def decode(code):
+        # Rebuild a state from encode()
+        return RoverState(*code)
+
+    def index(self):
+        # Pack the state into a number in range(N_STATES)
+        flags = (self.sample_extracted, self.holding_sample, self.charged, self.holding_tool)
+        index = self.LOCATIONS.index(self.loc)
+        for i, flag in enumerate(flags):
+            index += len(self.LOCATIONS) * (flag << i)
+        return index
+
+    @classmethod
+    def from_index(cls, index):
+        # Rebuild a state from index()
+        n_locations = len(cls.LOCATIONS)
+        loc, flags = cls.LOCATIONS[index % n_locations], index // n_locations
+        return cls(loc, bool(flags & 1), bool(flags & 2), bool(flags & 4), bool(flags & 8))
+
     def successors(self, action_list):
         # Generate successor states based on available actions
         successors = []
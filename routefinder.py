@@ -1,33 +1,74 @@
+from collections import OrderedDict
 from queue import PriorityQueue
+import asyncio
 import math
+import shelve
+import time
+import types
 from Graph import Graph, Node, Edge
+from search_algorithms import SearchBudget
 
-def a_star(start_state, heuristic_fn, goal_test, use_closed_list=True):
+def reconstruct_path(state):
+    # Follow the prev_state links back to the start
+    path = []
+    while state:
+        path.append(state)
+        state = state.prev_state
+    path.reverse()
+    return path
+
+class Path(list):
+    # The states from the start to the goal, as returned by the searches. partial is True when
+    # the search ran out of memory or budget first: the path then only leads to the closest
+    # state to the goal (lowest h) that it reached.
+    def __init__(self, states, partial=False):
+        super().__init__(states)
+        self.partial = partial
+
+def a_star(start_state, heuristic_fn, goal_test, use_closed_list=True, max_nodes=None, budget=None, weight=1,
+           cost_bound=None, verbose=True):
+    # If max_nodes is given and the stored states outgrow it, or the budget runs out, the search
+    # stops and returns the path to the most promising (lowest h) state seen so far as a partial Path.
+    # A weight above 1 inflates the heuristic (weighted A*): faster, but the path may be suboptimal.
+    # With a cost_bound, states whose g + h is already at or above it are dropped, since they
+    # can't lead to a cheaper path. verbose=False silences the state count.
     frontier = PriorityQueue()  # Priority queue for the frontier
     closed_set = set()  # Closed set to keep track of visited states
     frontier.put(start_state)
     if use_closed_list:
         closed_set.add(start_state)
     state_counter = 0  # Counter for the number of states expanded
+    best_state = start_state  # Closest state to the goal so far, used for partial results
+    best_h = heuristic_fn(start_state)
     while not frontier.empty():
+        # The closed set already holds every state on the frontier
+        stored = len(closed_set) if use_closed_list else frontier.qsize()
+        if max_nodes is not None and stored > max_nodes:
+            if verbose:
+                print(f"Node budget exhausted. Total states: {state_counter}")
+            return Path(reconstruct_path(best_state), partial=True)
+        if budget is not None and budget.tick():
+            if verbose:
+                print(f"Search budget exhausted. Total states: {state_counter}")
+            return Path(reconstruct_path(best_state), partial=True)
         current_state = frontier.get()
         if goal_test(current_state):
             # Goal found, reconstruct the path
-            path = []
-            state = current_state
-            while state:
-                path.append(state)
-                state = state.prev_state
-            path.reverse()
-            print(f"Total states: {state_counter}")
-            return path
+            if verbose:
+                print(f"Total states: {state_counter}")
+            return Path(reconstruct_path(current_state))
+        current_h = heuristic_fn(current_state)
+        if current_h < best_h:
+            best_state, best_h = current_state, current_h
         edges = current_state.mars_graph.get_edges(Node(current_state.location)) or []
         successors = []
         for edge in edges:
             new_loc = edge.dest.value  # Get the location of the successor
             cost = current_state.g + edge.val  # Calculate new g value
             heuristic = heuristic_fn(map_state(new_loc, current_state.mars_graph))
-            new_state = map_state(new_loc, current_state.mars_graph, current_state, cost, heuristic)
+            if cost_bound is not None and cost + heuristic >= cost_bound:
+                continue  # Can't beat the best path found so far
+            new_state = map_state(new_loc, current_state.mars_graph, current_state, cost, weight * heuristic)
             if use_closed_list and new_state in closed_set:
                 continue  # Skip if already in closed set
             successors.append(new_state)
@@ -36,7 +77,140 @@ def a_star(start_state, heuristic_fn, goal_test, use_closed_list=True):
         state_counter += len(successors)  # Increment state counter
         for state in successors:
             frontier.put(state)
+    if verbose:
+        print(f"Total states: {state_counter}")
+    return None  # No path found
+
+def anytime_a_star(start_state, heuristic_fn, goal_test, budget=None, weights=(5, 3, 2, 1.5, 1)):
+    # Anytime weighted A*: a fast, greedy search with a large weight finds a first path, then
+    # the search is repeated with smaller weights while the budget lasts, keeping the cheapest
+    # path found. Each pass drops states that can't beat that path, so later passes finish
+    # sooner. When the last weight is 1 and it finishes in time, the result is optimal.
+    # If the budget runs out before any path is found, the partial Path of the last pass is returned.
+    best_path = None
+    partial_path = None
+    for weight in weights:
+        if budget is not None and budget.exhausted():
+            break
+        cost_bound = best_path[-1].g if best_path else None
+        path = a_star(start_state, heuristic_fn, goal_test, budget=budget, weight=weight,
+                      cost_bound=cost_bound, verbose=False)
+        if path and path.partial:
+            partial_path = path
+        elif path:
+            best_path = path  # The cost bound guarantees it is cheaper
+    return best_path or partial_path
+
+async def a_star_async(start_state, heuristic_fn, goal_test, budget=None, weights=(5, 3, 2, 1.5, 1)):
+    # Runs anytime_a_star in a worker thread so the event loop stays responsive.
+    # If the awaiting task is cancelled, the budget is cancelled too and the search stops
+    # at its next expansion.
+    if budget is None:
+        budget = SearchBudget()
+    try:
+        return await asyncio.to_thread(anytime_a_star, start_state, heuristic_fn, goal_test, budget, weights)
+    except asyncio.CancelledError:
+        budget.cancel()
+        raise
+
+def sma_star(start_state, heuristic_fn, goal_test, max_nodes, budget=None):
+    # Memory-bounded A* (SMA*). At most max_nodes states are kept in memory, and the optimal
+    # path is found whenever it fits, i.e. has at most max_nodes states.
+    # Successors are generated one at a time, most promising first. When memory is full, the
+    # worst leaf (highest f, shallowest) is forgotten and its f is backed up into its parent,
+    # which stays selectable so the branch can be regenerated if it becomes the best again.
+    # If memory or the budget runs out first, the path to the closest state (lowest h) is
+    # returned as a partial Path.
+    # Bookkeeping is keyed by id() because map_state equality only compares locations.
+    graph = start_state.mars_graph
+    start_state = map_state(start_state.location, graph, None, start_state.g, heuristic_fn(start_state))
+    depth = {id(start_state): 0}  # Depth of each stored state
+    children = {id(start_state): 0}  # Number of each state's children in memory
+    pending = {}  # Expanded state -> {location: f} of its successors not in memory
+    open_states = {id(start_state): start_state}  # States that can still generate a successor
+    in_memory = 1
+    state_counter = 0  # Counter for the number of states generated
+    best_state = start_state  # Closest state to the goal so far, used for partial results
+    cut_off = False  # Whether memory or the budget cut some path short
+
+    def f_value(state):
+        # Lowest f among what is left to explore from state
+        if id(state) in pending:
+            return min(pending[id(state)].values(), default=math.inf)
+        return state.f
+
+    def forget(state):
+        nonlocal in_memory
+        del open_states[id(state)]
+        in_memory -= 1
+        parent = state.prev_state
+        value = f_value(state)
+        for table in (depth, children, pending):
+            table.pop(id(state), None)
+        if parent is not None:
+            # Back up the f value, so the parent knows how good the forgotten branch was
+            pending[id(parent)][state.location] = value
+            children[id(parent)] -= 1
+            open_states[id(parent)] = parent
+
+    while open_states:
+        # Pick the lowest f state, preferring the deepest one
+        current_state = min(open_states.values(), key=lambda s: (f_value(s), -depth[id(s)]))
+        if f_value(current_state) == math.inf:
+            break  # Nothing left that fits in memory
+        if budget is not None and budget.tick():
+            cut_off = True
+            break
+
+        if id(current_state) not in pending:
+            # First visit: goal test, then work out the successors and their f values
+            if goal_test(current_state):
+                print(f"Total states: {state_counter}")
+                return Path(reconstruct_path(current_state))
+            on_path = {s.location for s in reconstruct_path(current_state)}
+            successors = {}
+            for edge in graph.get_edges(Node(current_state.location)) or []:
+                new_loc = edge.dest.value
+                if new_loc in on_path:
+                    continue
+                new_state = map_state(new_loc, graph)
+                new_depth = depth[id(current_state)] + 1
+                if new_depth >= max_nodes or (new_depth == max_nodes - 1 and not goal_test(new_state)):
+                    successors[new_loc] = math.inf  # No memory left to extend this path any further
+                    cut_off = True
+                else:
+                    # Keep f monotone along the path
+                    successors[new_loc] = max(current_state.f, current_state.g + edge.val + heuristic_fn(new_state))
+            pending[id(current_state)] = successors
+            if f_value(current_state) == math.inf:
+                continue  # Dead end; it stays a leaf until it is forgotten
+
+        # Generate the most promising successor that isn't in memory
+        successors = pending[id(current_state)]
+        new_loc = min(successors, key=successors.get)
+        new_f = successors.pop(new_loc)
+        cost = current_state.g + graph.get_edge(Node(current_state.location), Node(new_loc)).val
+        new_state = map_state(new_loc, graph, current_state, cost, heuristic_fn(map_state(new_loc, graph)))
+        new_state.f = new_f
+        depth[id(new_state)] = depth[id(current_state)] + 1
+        children[id(new_state)] = 0
+        children[id(current_state)] += 1
+        open_states[id(new_state)] = new_state
+        in_memory += 1
+        state_counter += 1
+        if new_state.h < best_state.h:
+            best_state = new_state
+        if not successors:
+            del open_states[id(current_state)]  # All its successors are in memory
+
+        # Forget the worst leaves until we are back within the budget
+        while in_memory > max_nodes:
+            leaves = [s for s in open_states.values() if children[id(s)] == 0]
+            forget(max(leaves, key=lambda s: (f_value(s), -depth[id(s)])))
+
     print(f"Total states: {state_counter}")
+    if cut_off:
+        return Path(reconstruct_path(best_state), partial=True)
     return None  # No path found
 
 class map_state:
@@ -106,6 +280,149 @@ def read_mars_graph(filename):
                 graph.add_edge(Edge(nodes[node_name], nodes[neighbor_name], 1))
     return graph
 
+class RouteCache:
+    # Caches A* routes, keyed by (graph content hash, start, goal test, heuristic).
+    # Each route is stored once, together with an index from every suffix of it to its offset
+    # in the route: the rest of an optimal path is itself an optimal path to the goal.
+    # The most recently used `capacity` routes are kept in memory; if a filename is given,
+    # routes are also kept in an on-disk shelve so they survive restarts. The shelve only holds
+    # routes for one graph: it is cleared when a different content hash is looked up or stored.
+    # Since the key includes the graph's content hash, changing the map (e.g. add_edge)
+    # makes the old routes unreachable. Goal tests and heuristics are identified by the
+    # goal_key/heuristic_key given by the caller, or else by their qualified name; lambdas,
+    # local functions, bound methods and other callables need an explicit key to be cached.
+    def __init__(self, capacity=256, filename=None):
+        self.capacity = capacity  # Number of routes kept in memory
+        self.routes = OrderedDict()  # route key -> tuple of locations, least recently used first
+        self.index = {}  # key of the route or any suffix of it -> (route key, offset)
+        self.db = shelve.open(filename) if filename is not None else None
+        self.hits = 0
+        self.misses = 0
+        self.lookup_time = 0.0  # Total seconds spent in get()
+
+    def key(self, graph, start, goal_test, heuristic_fn, goal_key=None, heuristic_key=None):
+        # Returns None if the goal test or heuristic can't be identified
+        goal_key = goal_key if goal_key is not None else _function_key(goal_test)
+        heuristic_key = heuristic_key if heuristic_key is not None else _function_key(heuristic_fn)
+        if goal_key is None or heuristic_key is None:
+            return None
+        return (graph.content_hash(), start, goal_key, heuristic_key)
+
+    def get(self, key, valid=None):
+        # Returns the cached locations for key, or None on a miss.
+        # If valid is given, routes it rejects are treated as misses.
+        started = time.perf_counter()
+        route = None
+        if key in self.index:
+            route_key, offset = self.index[key]
+            self.routes.move_to_end(route_key)
+            route = self.routes[route_key][offset:]
+        elif self._disk(key[0]):
+            entry = self.db.get(repr(key))
+            if entry is not None:
+                route_key, offset = entry
+                self._remember(route_key, self.db["route " + repr(route_key)])
+                route = self.routes[route_key][offset:]
+        if route is not None and valid is not None and not valid(route):
+            route = None
+        if route is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        self.lookup_time += time.perf_counter() - started
+        return route
+
+    def put(self, key, route):
+        # Stores an optimal route under key, and indexes every suffix of it
+        route = tuple(route)
+        self._remember(key, route)
+        if self._disk(key[0]):
+            self.db["route " + repr(key)] = route
+            for suffix_key, offset in self._suffixes(key, route):
+                self.db[repr(suffix_key)] = (key, offset)
+            self.db.sync()
+
+    def _suffixes(self, key, route):
+        # (key, offset) for every suffix of route, ending with the full route itself
+        graph_hash, _, goal_key, heuristic_key = key
+        for offset in range(len(route) - 1, 0, -1):
+            yield (graph_hash, route[offset], goal_key, heuristic_key), offset
+        yield key, 0
+
+    def _remember(self, key, route):
+        if key in self.routes:
+            self._forget(key)
+        self.routes[key] = route
+        # The full route's key goes in last, so none of its suffixes can replace it
+        for suffix_key, offset in self._suffixes(key, route):
+            self.index[suffix_key] = (key, offset)
+        while len(self.routes) > self.capacity:
+            self._forget(next(iter(self.routes)))  # Evict the least recently used route
+
+    def _forget(self, key):
+        route = self.routes.pop(key)
+        for suffix_key, _ in self._suffixes(key, route):
+            if self.index.get(suffix_key, (None,))[0] == key:
+                del self.index[suffix_key]
+
+    def _disk(self, graph_hash):
+        # True if there is an on-disk tier; routes for any other graph are dropped from it
+        if self.db is None:
+            return False
+        if self.db.get("graph") != graph_hash:
+            self.db.clear()
+            self.db["graph"] = graph_hash
+        return True
+
+    def clear(self):
+        self.routes.clear()
+        self.index.clear()
+        if self.db is not None:
+            self.db.clear()
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def average_lookup_time(self):
+        lookups = self.hits + self.misses
+        return self.lookup_time / lookups if lookups else 0.0
+
+def _function_key(fn):
+    # A function's module and qualified name, or None if that doesn't identify it: lambdas,
+    # local functions, bound methods, functools.partial and other callable objects
+    name = getattr(fn, "__qualname__", None)
+    bound_to = getattr(fn, "__self__", None)
+    if name is None or "<" in name or (bound_to is not None and not isinstance(bound_to, types.ModuleType)):
+        return None
+    return f"{fn.__module__}.{name}"
+
+def cached_a_star(start_state, heuristic_fn, goal_test, cache, goal_key=None, heuristic_key=None):
+    # Same as a_star, but answers repeated requests from the cache.
+    # Cached routes are rebuilt into map_states with their g and h values.
+    # goal_key and heuristic_key identify the goal and heuristic in the cache (see RouteCache).
+    graph = start_state.mars_graph
+    key = cache.key(graph, start_state.location, goal_test, heuristic_fn, goal_key, heuristic_key)
+    if key is None:
+        return a_star(start_state, heuristic_fn, goal_test)
+    # A route that doesn't end at a goal was stored under a clashing key; search again
+    route = cache.get(key, lambda route: goal_test(map_state(route[-1], graph)))
+    if route is None:
+        path = a_star(start_state, heuristic_fn, goal_test)
+        if path and not path.partial:
+            cache.put(key, [state.location for state in path])
+        return path
+    state = start_state
+    for location in route[1:]:
+        cost = state.g + graph.get_edge(Node(state.location), Node(location)).val
+        state = map_state(location, graph, state, cost, heuristic_fn(map_state(location, graph)))
+    return Path(reconstruct_path(state))
+
 if __name__ == "__main__":
     filename = 'MarsMap'  # Filename of the Mars map
     mars_graph = read_mars_graph(filename)
@@ -1,8 +1,65 @@
 from collections import deque
+from functools import lru_cache
 from queue import PriorityQueue
+import multiprocessing
+import multiprocessing.connection
+import time
+import traceback
+import zlib
+
+
+# Search budget
+# Limits a search by wall-clock time and/or number of expansions, and doubles as a
+# cooperative cancellation token: another thread can call cancel() to stop the search.
+# The clock starts when the budget is created, so one budget can be shared by several searches.
+class SearchBudget:
+    def __init__(self, time_limit=None, max_expansions=None):
+        self.deadline = None if time_limit is None else time.monotonic() + time_limit
+        self.max_expansions = max_expansions
+        self.expansions = 0  # Number of expansions charged so far
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def exhausted(self):
+        # True once the search has been cancelled or has run out of time or expansions
+        return (
+            self.cancelled
+            or (self.deadline is not None and time.monotonic() >= self.deadline)
+            or (self.max_expansions is not None and self.expansions >= self.max_expansions)
+        )
+
+    def tick(self):
+        # Charge one expansion; returns True if the search must stop instead
+        if self.exhausted():
+            return True
+        self.expansions += 1
+        return False
+
+    def remaining(self):
+        # Expansions left, or None if there is no expansion limit
+        if self.max_expansions is None:
+            return None
+        return max(self.max_expansions - self.expansions, 0)
+
+    def charge(self, n):
+        # Charge n expansions done in a batch; callers must stay within remaining()
+        self.expansions += n
+
+
+# Search result
+# The (state, action, state count) tuple returned by the searches. partial is True when the
+# search was stopped by its node or time budget before reaching a goal; state and action are
+# then those of the last state it expanded (None if it expanded nothing), its best partial result.
+class SearchResult(tuple):
+    def __new__(cls, state, action, count, partial=False):
+        result = super().__new__(cls, (state, action, count))
+        result.partial = partial
+        return result
 
 # Breadth-First Search (BFS)
-def breadth_first_search(startState, action_list, goal_test, use_closed_list=True):
+def breadth_first_search(startState, action_list, goal_test, use_closed_list=True, max_nodes=None, budget=None):
     search_queue = deque()  # Initialize the queue for BFS
     closed_list = set()  # A set to track visited states (closed list)
     state_counter = 0  # Initialize state counter
@@ -11,14 +68,21 @@ def breadth_first_search(startState, action_list, goal_test, use_closed_list=Tru
     search_queue.append((startState, ""))
     if use_closed_list:
         closed_list.add(startState)  # Mark the initial state as visited
+    next_state = (None, None)  # The last state dequeued, returned if the search is stopped
 
     while search_queue:
+        # Give up gracefully once the stored states exceed the memory budget, or when the
+        # time/expansion budget runs out or the search is cancelled
+        if ((max_nodes is not None and len(search_queue) + len(closed_list) > max_nodes)
+                or (budget is not None and budget.tick())):
+            return SearchResult(next_state[0], next_state[1], state_counter, partial=True)
+
         next_state = search_queue.popleft()  # Dequeue the first state
 
         # Check if the current state satisfies the goal condition
         if goal_test(next_state[0]):
             # Return the result and state count
-            return (next_state[0], next_state[1], state_counter)
+            return SearchResult(next_state[0], next_state[1], state_counter)
         else:
             # Get the successors of the current state
             successors = next_state[0].successors(action_list)
@@ -38,11 +102,384 @@ def breadth_first_search(startState, action_list, goal_test, use_closed_list=Tru
             search_queue.extend(successors)
 
     # If the goal is not found, return None and the total number of states generated
-    return (None, None, state_counter)
+    return SearchResult(None, None, state_counter)
+
+
+# Parallel Breadth-First Search
+# Level-synchronous BFS over a pool of worker processes. Each worker owns a shard of the state
+# space (by a hash of the state's encoding): the frontier states, closed list and parent links
+# in that shard. Workers goal-test and expand their own frontier and send each child straight
+# to the worker that owns it, as its compact encoding; the parent process only exchanges a few
+# small control messages per layer. States must provide encode() and a static decode(code);
+# action_list and goal_test are handed to the workers, so they must be picklable unless the
+# platform starts processes by forking.
+# Every state carries an integer key (parent key * len(action_list) + successor position) that
+# orders it the way the serial queue would, so the result and state count are the same as
+# breadth_first_search with a closed list, including when an expansion budget runs out.
+# Only the expansion work is split up, so it pays off when successors and goal tests are
+# expensive compared to sending a state between processes. It is not a drop-in speedup: on
+# small domains like the rover planner, process start-up and the per-layer messages cost far
+# more than the search itself, and it is slower than breadth_first_search. That is why
+# n_workers has no default; measure on the target domain before choosing it.
+# If goal_test or successors() raises in a worker, the exception is re-raised here with the
+# worker's traceback as its cause.
+def parallel_breadth_first_search(startState, action_list, goal_test, n_workers, budget=None,
+                                  chunk_size=10000):
+    inboxes = [multiprocessing.Queue() for _ in range(n_workers)]
+    workers = []
+    for worker_id in range(n_workers):
+        conn, worker_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=_bfs_worker,
+            args=(worker_id, worker_conn, inboxes, type(startState).decode, action_list, goal_test),
+            daemon=True,
+        )
+        process.start()
+        worker_conn.close()  # So recv() raises EOFError instead of blocking if the worker dies
+        workers.append((process, conn))
+
+    def ask_all(message):
+        # Waits for every reply, but raises as soon as any worker fails: the others may be
+        # blocked waiting on the failed one's shard traffic
+        for _, conn in workers:
+            conn.send(message)
+        replies = {}
+        pending = [conn for _, conn in workers]
+        while pending:
+            for conn in multiprocessing.connection.wait(pending):
+                replies[conn] = _reply(conn)
+                pending.remove(conn)
+        return [replies[conn] for _, conn in workers]
+
+    def ask_owner(code, message):
+        conn = workers[_shard_of(code, n_workers)][1]
+        conn.send(message)
+        return _reply(conn)
+
+    try:
+        start_code = startState.encode()
+        ask_owner(start_code, ("start", start_code))
+        state_counter = 0
+        last = None  # (key, code, action) of the last state expanded, in serial order
+
+        while True:
+            # Each worker reports its first goal in queue order and its share of the layer
+            reports = ask_all(("goal",))
+            if sum(size for _, size in reports) == 0:
+                break
+            goals = [goal for goal, _ in reports if goal is not None]
+            goal = min(goals) if goals else None  # (key, code, action) of the first goal
+            limit = goal[0] if goal else None  # Only states before the goal are expanded
+
+            # Serial BFS charges one expansion per state it dequeues, the goal included.
+            # If the budget can't cover that, expand only the states it can cover, then stop.
+            remaining = budget.remaining() if budget is not None else None
+            if remaining is not None:
+                needed = sum(ask_all(("count", limit))) + (1 if goal else 0)
+                if remaining < needed:
+                    goal = None
+                    keys = sorted(key for keys in ask_all(("smallest", limit, remaining)) for key in keys)
+                    limit = keys[remaining - 1] + 1 if remaining else 0
+
+            # Expand the layer a chunk at a time, so time limits and cancellation are noticed
+            stopped = False
+            layer_last = []
+            while True:
+                if budget is not None and budget.exhausted() and budget.remaining() != 0:
+                    stopped = True  # Out of time or cancelled
+                    break
+                replies = ask_all(("expand", limit, chunk_size))
+                expanded = sum(count for count, _ in replies)
+                layer_last.extend(state for _, state in replies if state is not None)
+                if budget is not None:
+                    budget.charge(expanded)
+                if expanded == 0:
+                    break
+            if layer_last:
+                last = max(layer_last)
+
+            # Workers swap children directly and report how many new states they kept
+            state_counter += sum(ask_all(("merge",)))
+
+            if goal is not None and not stopped:
+                if budget is not None:
+                    budget.charge(1)  # Dequeuing the goal
+                _, goal_code, goal_action = goal
+                return SearchResult(_rebuild_state(startState, goal_code, ask_owner), goal_action, state_counter)
+            if stopped or (budget is not None and budget.exhausted()):
+                # Like the serial search, hand back the last state expanded
+                if last is None:
+                    return SearchResult(None, None, state_counter, partial=True)
+                _, last_code, last_action = last
+                return SearchResult(_rebuild_state(startState, last_code, ask_owner), last_action,
+                                    state_counter, partial=True)
+
+        return SearchResult(None, None, state_counter)
+    finally:
+        for process, conn in workers:
+            try:
+                conn.send(("stop",))
+            except OSError:
+                pass  # The worker has already exited
+        for process, conn in workers:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()  # Still blocked on a shard that failed
+                process.join()
+            conn.close()
+
+
+class _RemoteTraceback(Exception):
+    # Carries a worker's formatted traceback, as the cause of the re-raised exception
+    def __str__(self):
+        return self.args[0]
+
+
+def _reply(conn):
+    # Receive one worker reply, re-raising the worker's exception if it failed
+    try:
+        status, *value = conn.recv()
+    except EOFError:
+        raise RuntimeError("parallel_breadth_first_search: a worker exited unexpectedly") from None
+    if status == "ok":
+        return value[0]
+    error, text = value
+    if error is None:
+        raise RuntimeError("parallel_breadth_first_search: a worker failed\n" + text)
+    raise error from _RemoteTraceback(text)
+
+
+def _shard_of(code, n_workers):
+    # The worker that owns an encoded state; unlike hash(), crc32 is the same in every process
+    return zlib.crc32(repr(code).encode()) % n_workers
+
+
+def _bfs_worker(worker_id, conn, inboxes, decode, action_list, goal_test):
+    # Worker loop for parallel_breadth_first_search: replies are ("ok", value), or
+    # ("error", exception, traceback) after which the worker exits
+    try:
+        _bfs_worker_loop(worker_id, conn, inboxes, decode, action_list, goal_test)
+    except Exception as error:
+        text = traceback.format_exc()
+        try:
+            conn.send(("error", error, text))
+        except Exception:
+            conn.send(("error", None, text))  # The exception itself can't be pickled
+
+
+def _bfs_worker_loop(worker_id, conn, inboxes, decode, action_list, goal_test):
+    n_workers = len(inboxes)
+    width = max(len(action_list), 1)  # Keys leave room for one slot per action
+    closed = {}  # encoded state -> (parent code, action) for the states this worker owns
+    frontier = []  # (key, code, action) of this shard's part of the layer, in queue order
+    cursor = 0  # Number of frontier states expanded so far
+    local = []  # Children this worker owns itself
+    while True:
+        message = conn.recv()
+        command = message[0]
+        if command == "start":
+            closed[message[1]] = (None, "")
+            frontier = [(0, message[1], "")]
+            conn.send(("ok", None))
+        elif command == "goal":
+            goal = next(((key, code, action) for key, code, action in frontier if goal_test(decode(code))), None)
+            conn.send(("ok", (goal, len(frontier))))
+        elif command == "count":
+            limit = message[1]
+            conn.send(("ok", sum(1 for key, _, _ in frontier if limit is None or key < limit)))
+        elif command == "smallest":
+            limit, k = message[1], message[2]
+            conn.send(("ok", [key for key, _, _ in frontier[:k] if limit is None or key < limit]))
+        elif command == "expand":
+            limit, chunk_size = message[1], message[2]
+            outgoing = [[] for _ in range(n_workers)]
+            expanded = 0
+            last = None
+            while cursor < len(frontier) and expanded < chunk_size:
+                key, code, action = frontier[cursor]
+                if limit is not None and key >= limit:
+                    break
+                last = (key, code, action)
+                for position, (s, action) in enumerate(decode(code).successors(action_list)):
+                    child = s.encode()
+                    outgoing[_shard_of(child, n_workers)].append((key * width + position, child, code, action))
+                cursor += 1
+                expanded += 1
+            for owner, items in enumerate(outgoing):
+                if owner == worker_id:
+                    local.extend(items)
+                elif items:
+                    inboxes[owner].put(items)
+            conn.send(("ok", (expanded, last)))
+        elif command == "merge":
+            # Tell every other worker this layer is done, then collect what they sent
+            for owner, inbox in enumerate(inboxes):
+                if owner != worker_id:
+                    inbox.put(None)
+            candidates = local
+            finished = 1
+            while finished < n_workers:
+                items = inboxes[worker_id].get()
+                if items is None:
+                    finished += 1
+                else:
+                    candidates.extend(items)
+            # Like the serial BFS, a child is new unless it was seen before its parent was
+            # expanded, so only the first parent to reach it (lowest key) keeps it
+            first_parent = {}
+            for key, child, _, _ in candidates:
+                if child not in closed:
+                    first_parent[child] = min(first_parent.get(child, key // width), key // width)
+            frontier = []
+            for key, child, parent, action in sorted(candidates):
+                if first_parent.get(child) == key // width:
+                    closed.setdefault(child, (parent, action))
+                    frontier.append((key, child, action))
+            cursor = 0
+            local = []
+            conn.send(("ok", len(frontier)))
+        elif command == "parent":
+            conn.send(("ok", closed[message[1]]))
+        else:
+            break
+
+
+def _rebuild_state(startState, code, ask_owner):
+    # Follow the parent links through the shards and rebuild the prev chain on top of startState
+    codes = []
+    parent = ask_owner(code, ("parent", code))[0]
+    while parent is not None:
+        codes.append(code)
+        code = parent
+        parent = ask_owner(code, ("parent", code))[0]
+    state = startState
+    for code in reversed(codes):
+        new_state = type(startState).decode(code)
+        new_state.prev = state
+        state = new_state
+    return state
+
+
+# Set-Based Search
+# Breadth-first image computation over sets of states instead of single states. A set is a
+# bitset (a Python int) over packed state indices, and each action is applied to the whole
+# frontier at once with masks and shifts. States must provide N_STATES, index() and a
+# classmethod from_index(index).
+# Returns a SearchResult of (a goal state, shortest plan length, number of states generated).
+# Like the other searches, the count leaves out the start state; as whole layers are generated
+# at once, it includes all of the goal's layer. The goal state has no prev chain; use
+# breadth_first_search to recover the plan itself.
+# A budget is charged one expansion per state in each layer expanded, and checked before each
+# layer: a layer that would go over max_expansions is not expanded. When the budget stops the
+# search, the result is partial, with a state from the deepest layer reached and its depth.
+# The masks come from running every action on every packed state once, reachable or not,
+# so the first search of a domain costs a full enumeration of the state space (more than a
+# plain BFS that only visits reachable states). The masks are cached per state class and
+# action list, so it is later searches, with other start states and goals, that are cheap.
+# The goal set is also built by testing every packed state, on each call.
+def set_based_search(startState, action_list, goal_test, budget=None):
+    state_class = type(startState)
+    transitions = _bitset_transitions(state_class, tuple(action_list))
+    goal = _bitset_of(state_class, goal_test)
+
+    reached = frontier = 1 << startState.index()
+    depth = 0
+    while frontier:
+        hits = frontier & goal
+        if hits:
+            first_goal = (hits & -hits).bit_length() - 1  # Lowest goal index in the frontier
+            return SearchResult(state_class.from_index(first_goal), depth, bin(reached).count("1") - 1)
+
+        if budget is not None:
+            size = bin(frontier).count("1")
+            remaining = budget.remaining()
+            if budget.exhausted() or (remaining is not None and remaining < size):
+                lowest = (frontier & -frontier).bit_length() - 1
+                return SearchResult(state_class.from_index(lowest), depth, bin(reached).count("1") - 1,
+                                    partial=True)
+            budget.charge(size)
+
+        # Image of the frontier under every action, minus the states already reached
+        image = 0
+        for delta, mask in transitions:
+            moved = frontier & mask
+            image |= moved << delta if delta >= 0 else moved >> -delta
+        frontier = image & ~reached
+        reached |= frontier
+        depth += 1
+
+    # If the goal is unreachable, return None and the number of states generated
+    return SearchResult(None, None, bin(reached).count("1") - 1)
+
+
+@lru_cache(maxsize=None)
+def _bitset_transitions(state_class, action_list):
+    # Enumerate every packed state once and group its transitions by index change (delta), so each
+    # group can be applied to a whole set as (set & mask) shifted by delta
+    masks = {}
+    for index in range(state_class.N_STATES):
+        for successor, _ in state_class.from_index(index).successors(action_list):
+            delta = successor.index() - index
+            masks[delta] = masks.get(delta, 0) | (1 << index)
+    return tuple(masks.items())
+
+
+def _bitset_of(state_class, goal_test):
+    # The set of all states that satisfy goal_test
+    bits = 0
+    for index in range(state_class.N_STATES):
+        if goal_test(state_class.from_index(index)):
+            bits |= 1 << index
+    return bits
+
+
+# Beam Search
+# Breadth-first, but only the `width` best states of each layer are kept, so memory stays bounded.
+# States are ranked by heuristic_fn if one is given, otherwise generation order is kept.
+# Only the states kept in the beam go on the closed list.
+def beam_search(startState, action_list, goal_test, width, heuristic_fn=None, use_closed_list=True, budget=None):
+    beam = [(startState, "")]  # The current layer of the search
+    closed_list = set()  # A set to track visited states
+    state_counter = 0  # Initialize state counter
+
+    if use_closed_list:
+        closed_list.add(startState)
+
+    while beam:
+        # Check the current layer for a goal state
+        for state, action in beam:
+            if goal_test(state):
+                return SearchResult(state, action, state_counter)
+
+        # Generate the next layer
+        next_layer = []
+        layer_states = set()  # Drops duplicates within the layer
+        for state, action in beam:
+            if budget is not None and budget.tick():
+                # The beam is already ranked, so its first state is the best one
+                return SearchResult(beam[0][0], beam[0][1], state_counter, partial=True)
+            successors = state.successors(action_list)
+            if use_closed_list:
+                successors = [s for s in successors if s[0] not in closed_list and s[0] not in layer_states]
+                for s in successors:
+                    layer_states.add(s[0])
+            state_counter += len(successors)
+            next_layer.extend(successors)
+
+        # Keep only the best `width` states
+        if heuristic_fn is not None:
+            next_layer.sort(key=lambda s: heuristic_fn(s[0]))
+        beam = next_layer[:width]
+        if use_closed_list:
+            for s in beam:
+                closed_list.add(s[0])
+
+    # If the goal is not found, return None and the total number of states generated
+    return SearchResult(None, None, state_counter)
 
 
 # Depth-First Search (DFS)
-def depth_first_search(startState, action_list, goal_test, use_closed_list=True, limit=None):
+def depth_first_search(startState, action_list, goal_test, use_closed_list=True, limit=None, budget=None):
     search_stack = deque()  # Initialize the stack for DFS
     closed_list = set()  # A set to track visited states
     state_counter = 0  # Initialize state counter
@@ -52,13 +489,19 @@ def depth_first_search(startState, action_list, goal_test, use_closed_list=True,
     if use_closed_list:
         closed_list.add(startState)  # Mark the initial state as visited
 
+    next_state, action = None, None  # The last state popped, returned if the search is stopped
+
     while search_stack:
+        # Stop when the time/expansion budget runs out or the search is cancelled
+        if budget is not None and budget.tick():
+            return SearchResult(next_state, action, state_counter, partial=True)
+
         next_state, action, depth = search_stack.pop()  # Pop the last state
 
         # Check if the current state satisfies the goal condition
         if goal_test(next_state):
             # Return the result and state count
-            return (next_state, action, state_counter)
+            return SearchResult(next_state, action, state_counter)
         elif limit is None or depth < limit:
             # Get the successors of the current state
             successors = next_state.successors(action_list)
@@ -79,28 +522,28 @@ def depth_first_search(startState, action_list, goal_test, use_closed_list=True,
                 search_stack.append((s[0], s[1], depth + 1))
 
     # If the goal is not found, return None and the total number of states generated
-    return (None, None, state_counter)
+    return SearchResult(None, None, state_counter)
 
 
 # Depth-Limited Search (DLS)
-def depth_limited_search(startState, action_list, goal_test, limit, use_closed_list=True):
-    return depth_first_search(startState, action_list, goal_test, use_closed_list, limit)
+def depth_limited_search(startState, action_list, goal_test, limit, use_closed_list=True, budget=None):
+    return depth_first_search(startState, action_list, goal_test, use_closed_list, limit, budget)
 
 
 # Iterative Deepening Search (IDS)
-def iterative_deepening_search(startState, action_list, goal_test, max_depth, use_closed_list=True):
+def iterative_deepening_search(startState, action_list, goal_test, max_depth, use_closed_list=True, budget=None):
     total_state_count = 0  # Initialize total state counter
 
     for depth in range(max_depth + 1):
-        result = depth_limited_search(startState, action_list, goal_test, depth, use_closed_list)
+        result = depth_limited_search(startState, action_list, goal_test, depth, use_closed_list, budget)
         total_state_count += result[2]  # Accumulate state counts
 
-        if result[0]:
-            # Return the result and total state count
-            return (result[0], result[1], total_state_count)
+        if result[0] or result.partial:
+            # Return the result (or the partial result if the budget ran out) and total state count
+            return SearchResult(result[0], result[1], total_state_count, result.partial)
 
     # If the goal is not found, return None and the total number of states generated
-    return (None, None, total_state_count)
+    return SearchResult(None, None, total_state_count)
 
 
 
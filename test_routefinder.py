@@ -1,4 +1,9 @@
 from unittest import TestCase
+import contextlib
+import functools
+import io
+import os
+import tempfile
 from routefinder import *
 
 class Testmap_state(TestCase):
@@ -11,4 +16,159 @@ class Testmap_state(TestCase):
     def test_sld(self):
         s1 = map_state("7,6", g=1, h=1)
         val = sld(s1)
-        self.assertLessEqual(val, 14)
\ No newline at end of file
+        self.assertLessEqual(val, 14)
+
+class TestMemoryBounded(TestCase):
+    def setUp(self):
+        self.graph = read_mars_graph('MarsMap')
+        self.start = map_state("8,8", self.graph)
+
+    def test_sma_star(self):
+        full = a_star(self.start, sld, map_state.is_goal)
+        bounded = sma_star(self.start, sld, map_state.is_goal, 21)
+        self.assertEqual(bounded[-1].location, '1,1')
+        self.assertEqual(bounded[-1].g, full[-1].g)
+        self.assertFalse(bounded.partial)
+        # The optimal path needs 21 states, so a smaller budget only gets part of the way
+        partial = sma_star(self.start, sld, map_state.is_goal, 10)
+        self.assertTrue(partial.partial)
+        self.assertEqual(partial[0].location, '8,8')
+
+    def test_sma_star_fits_in_memory(self):
+        # SMA* finds the optimal path from every start as soon as that path fits in memory
+        for node in self.graph.g:
+            start = map_state(node.value, self.graph)
+            optimal = a_star(start, sld, map_state.is_goal)
+            if optimal is None:
+                continue
+            bounded = sma_star(start, sld, map_state.is_goal, len(optimal))
+            self.assertFalse(bounded.partial)
+            self.assertEqual(bounded[-1].g, optimal[-1].g)
+
+    def test_a_star_max_nodes(self):
+        partial = a_star(self.start, sld, map_state.is_goal, max_nodes=10)
+        self.assertTrue(partial.partial)
+        self.assertEqual(partial[0].location, '8,8')
+        self.assertFalse(map_state.is_goal(partial[-1]))
+        self.assertFalse(a_star(self.start, sld, map_state.is_goal).partial)
+
+
+class TestAnytime(TestCase):
+    def setUp(self):
+        self.graph = read_mars_graph('MarsMap')
+        self.start = map_state("8,8", self.graph)
+
+    def test_anytime_a_star(self):
+        optimal = a_star(self.start, sld, map_state.is_goal)
+        result = anytime_a_star(self.start, sld, map_state.is_goal)
+        self.assertEqual(result[-1].g, optimal[-1].g)
+        # With only a handful of expansions no complete path can be found
+        partial = anytime_a_star(self.start, sld, map_state.is_goal, SearchBudget(max_expansions=5))
+        self.assertTrue(partial.partial)
+
+    def test_anytime_a_star_prunes(self):
+        # Later passes drop states that can't beat the best path, so they expand less
+        weights = (5, 3, 2, 1.5, 1)
+        pruned = SearchBudget()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            anytime_a_star(self.start, sld, map_state.is_goal, pruned, weights)
+        self.assertEqual(output.getvalue(), '')
+        unpruned = SearchBudget()
+        for weight in weights:
+            a_star(self.start, sld, map_state.is_goal, budget=unpruned, weight=weight, verbose=False)
+        self.assertLess(pruned.expansions, unpruned.expansions)
+
+    def test_a_star_budget(self):
+        budget = SearchBudget()
+        budget.cancel()
+        partial = a_star(self.start, sld, map_state.is_goal, budget=budget)
+        self.assertEqual(partial, [self.start])
+
+    def test_a_star_async(self):
+        result = asyncio.run(a_star_async(self.start, sld, map_state.is_goal, SearchBudget(time_limit=5)))
+        self.assertTrue(map_state.is_goal(result[-1]))
+
+
+class TestRouteCache(TestCase):
+    def setUp(self):
+        self.graph = read_mars_graph('MarsMap')
+        self.start = map_state("8,8", self.graph)
+
+    def test_cache_hit(self):
+        cache = RouteCache()
+        first = cached_a_star(self.start, sld, map_state.is_goal, cache)
+        second = cached_a_star(self.start, sld, map_state.is_goal, cache)
+        self.assertEqual(first, second)
+        self.assertEqual(first[-1].g, second[-1].g)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.hit_rate(), 0.5)
+        # Any suffix of a cached route is answered without searching
+        middle = map_state(first[5].location, self.graph)
+        self.assertEqual(cached_a_star(middle, sld, map_state.is_goal, cache), first[5:])
+        self.assertEqual(cache.hits, 2)
+
+    def test_different_goals(self):
+        cache = RouteCache()
+        to_1_1 = cached_a_star(self.start, sld, lambda s: s.location == '1,1', cache)
+        to_5_5 = cached_a_star(self.start, sld, lambda s: s.location == '5,5', cache)
+        self.assertEqual(to_1_1[-1].location, '1,1')
+        self.assertEqual(to_5_5[-1].location, '5,5')
+        # Lambdas without a key are never cached
+        self.assertEqual(cache.hits + cache.misses, 0)
+        cached_a_star(self.start, sld, lambda s: s.location == '1,1', cache, goal_key='1,1')
+        path = cached_a_star(self.start, sld, lambda s: s.location == '5,5', cache, goal_key='5,5')
+        self.assertEqual(path[-1].location, '5,5')
+        self.assertEqual(cache.hits, 0)
+        # A cached route that misses the goal is treated as a miss
+        start = map_state('1,1', self.graph)
+        path = cached_a_star(start, sld, lambda s: s.location == '5,5', cache, goal_key='1,1')
+        self.assertEqual(path[-1].location, '5,5')
+        self.assertEqual(cache.hits, 0)
+
+    def test_invalidation(self):
+        cache = RouteCache()
+        cached_a_star(self.start, sld, map_state.is_goal, cache)
+        self.graph.add_edge(Edge(Node("8,8"), Node("1,1"), 1))
+        path = cached_a_star(self.start, sld, map_state.is_goal, cache)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(len(path), 2)
+
+    def test_small_capacity(self):
+        # A single route counts once against the capacity, however long it is
+        cache = RouteCache(capacity=1)
+        first = cached_a_star(self.start, sld, map_state.is_goal, cache)
+        self.assertGreater(len(first), 1)
+        self.assertEqual(len(cache.routes), 1)
+        second = cached_a_star(self.start, sld, map_state.is_goal, cache)
+        self.assertEqual(first, second)
+        self.assertEqual(cache.hits, 1)
+        # Caching another route evicts the first, along with its suffixes
+        cached_a_star(map_state('1,1', self.graph), sld, lambda s: s.location == '8,8', cache, goal_key='8,8')
+        self.assertEqual(len(cache.routes), 1)
+        self.assertNotIn(cache.key(self.graph, self.start, map_state.is_goal, sld), cache.index)
+
+    def test_unkeyable_functions(self):
+        cache = RouteCache()
+        goal = functools.partial(lambda location, s: s.location == location, '1,1')
+        path = cached_a_star(self.start, sld, goal, cache)
+        self.assertEqual(path[-1].location, '1,1')
+        self.assertEqual(cache.hits + cache.misses, 0)
+        self.assertIsNone(cache.key(self.graph, self.start, self.start.is_goal, sld))
+        self.assertIsNotNone(cache.key(self.graph, self.start, goal, sld, goal_key='1,1'))
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'routes')
+            cache = RouteCache(filename=filename)
+            cached_a_star(self.start, sld, map_state.is_goal, cache)
+            cache.close()
+            cache = RouteCache(filename=filename)
+            path = cached_a_star(self.start, sld, map_state.is_goal, cache)
+            self.assertEqual(cache.hits, 1)
+            self.assertEqual(path[-1].location, '1,1')
+            # Routes for an older version of the map are dropped from disk
+            self.graph.add_edge(Edge(Node("8,8"), Node("1,1"), 1))
+            cached_a_star(self.start, sld, map_state.is_goal, cache)
+            self.assertEqual(len(cache.db), 4)  # The graph hash, the new route and its two keys
+            cache.close()
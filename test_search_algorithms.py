@@ -37,3 +37,128 @@ class Test(TestCase):
         s3 = RoverState()
         result = depth_first_search(s3, action_list, g3)
         print(result)
+
+    def test_beam_search(self):
+        s = RoverState()
+        result = beam_search(s, action_list, mission_complete, 3)
+        self.assertTrue(mission_complete(result[0]))
+        # A beam of one drops the states the shortest plan needs, so it finds a longer plan
+        shortest = len(_plan(breadth_first_search(s, action_list, mission_complete)[0]))
+        result = beam_search(s, action_list, mission_complete, 1)
+        self.assertTrue(mission_complete(result[0]))
+        self.assertGreater(len(_plan(result[0])), shortest)
+        result = beam_search(s, action_list, mission_complete, 100)
+        self.assertEqual(len(_plan(result[0])), shortest)
+
+    def test_breadth_first_search_max_nodes(self):
+        s = RoverState()
+        # Running out of memory gives the last state expanded, flagged as partial
+        result = breadth_first_search(s, action_list, mission_complete, max_nodes=5)
+        self.assertTrue(result.partial)
+        self.assertFalse(mission_complete(result[0]))
+        result = breadth_first_search(s, action_list, mission_complete, max_nodes=1000)
+        self.assertTrue(mission_complete(result[0]))
+        self.assertFalse(result.partial)
+
+    def test_search_budget(self):
+        s = RoverState()
+        budget = SearchBudget(max_expansions=3)
+        result = breadth_first_search(s, action_list, mission_complete, budget=budget)
+        self.assertTrue(result.partial)
+        self.assertIsNotNone(result[0])
+        self.assertEqual(budget.expansions, 3)
+        budget = SearchBudget()
+        budget.cancel()
+        result = iterative_deepening_search(s, action_list, mission_complete, 20, budget=budget)
+        self.assertEqual(result, (None, None, 0))
+        self.assertTrue(result.partial)
+
+    def test_parallel_breadth_first_search(self):
+        def g(s):
+            return s.loc == "sample" and s.sample_extracted == True
+        for goal in (g, mission_complete, move_to_sample_goal):
+            serial = breadth_first_search(RoverState(), action_list, goal)
+            parallel = parallel_breadth_first_search(RoverState(), action_list, goal, n_workers=2)
+            self.assertEqual(parallel[0], serial[0])
+            self.assertEqual(parallel[1], serial[1])
+            self.assertEqual(parallel[2], serial[2])
+            # The prev chain gives the same plan length
+            self.assertEqual(len(_plan(parallel[0])), len(_plan(serial[0])))
+
+        # Starting from a state that already has a prev chain keeps that history
+        start = breadth_first_search(RoverState(), action_list, move_to_sample_goal)[0]
+        serial = breadth_first_search(start, action_list, remove_sample_goal)
+        parallel = parallel_breadth_first_search(start, action_list, remove_sample_goal, n_workers=2)
+        self.assertEqual(len(_plan(parallel[0])), len(_plan(serial[0])))
+        self.assertTrue(any(s is start for s in _plan(parallel[0])))
+
+    def test_parallel_breadth_first_search_budget(self):
+        serial_budget = SearchBudget(max_expansions=3)
+        serial = breadth_first_search(RoverState(), action_list, mission_complete, budget=serial_budget)
+        budget = SearchBudget(max_expansions=3)
+        parallel = parallel_breadth_first_search(RoverState(), action_list, mission_complete,
+                                                 n_workers=2, budget=budget, chunk_size=1)
+        self.assertEqual(parallel, serial)
+        self.assertTrue(parallel.partial and serial.partial)
+        self.assertEqual(budget.expansions, 3)
+        budget = SearchBudget()
+        budget.cancel()
+        parallel = parallel_breadth_first_search(RoverState(), action_list, mission_complete,
+                                                 n_workers=2, budget=budget)
+        self.assertEqual(parallel, (None, None, 0))
+
+    def test_parallel_breadth_first_search_error(self):
+        # An exception in a worker reaches the caller instead of leaving it waiting forever
+        def broken_goal(s):
+            if s.loc == "battery":
+                raise ValueError("no goal test for the battery")
+            return False
+        with self.assertRaises(ValueError):
+            parallel_breadth_first_search(RoverState(), action_list, broken_goal, n_workers=2)
+
+
+def _plan(state):
+    plan = []
+    while state:
+        plan.append(state)
+        state = state.prev
+    return plan
+
+
+class TestSetBasedSearch(TestCase):
+    def test_index(self):
+        for i in range(RoverState.N_STATES):
+            self.assertEqual(RoverState.from_index(i).index(), i)
+
+    def test_set_based_search(self):
+        for goal in (mission_complete, remove_sample_goal, return_to_charger_goal):
+            serial = breadth_first_search(RoverState(), action_list, goal)
+            result = set_based_search(RoverState(), action_list, goal)
+            self.assertTrue(goal(result[0]))
+            self.assertEqual(result[1], len(_plan(serial[0])) - 1)
+
+    def test_unreachable(self):
+        def g(s):
+            return s.holding_sample and not s.sample_extracted
+        result = set_based_search(RoverState(), action_list, g)
+        serial = breadth_first_search(RoverState(), action_list, g)
+        self.assertEqual(result[:2], (None, None))
+        # Every reachable state, counted the way breadth_first_search counts them
+        self.assertEqual(result[2], serial[2])
+        # Without the tool actions the sample can never be extracted
+        result = set_based_search(RoverState(), action_list_part3, mission_complete)
+        self.assertIsNone(result[0])
+
+    def test_budget(self):
+        full = set_based_search(RoverState(), action_list, mission_complete)
+        budget = SearchBudget(max_expansions=3)
+        result = set_based_search(RoverState(), action_list, mission_complete, budget=budget)
+        self.assertTrue(result.partial)
+        self.assertFalse(full.partial)
+        self.assertLess(result[1], full[1])
+        self.assertLessEqual(budget.expansions, 3)
+        budget = SearchBudget()
+        budget.cancel()
+        result = set_based_search(RoverState(), action_list, mission_complete, budget=budget)
+        self.assertEqual(result, (RoverState(), 0, 0))
+        self.assertTrue(result.partial)